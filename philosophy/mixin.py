@@ -1,33 +1,78 @@
 import inspect as _inspect
+import sqlalchemy
+import sqlalchemy.orm
+from weakref import WeakKeyDictionary
 
 
-def mixin_sqlalchemy(obj, cls):
-    import sqlalchemy
-
-    _module = sqlalchemy
-    _modules = sorted(
-        name
-        for name, obj in _module.__dict__.items()
-        if not (name.startswith("_") or _inspect.ismodule(obj))
+def _public_attributes(module):
+    """Return the sorted ``(name, value)`` pairs of a module's public,
+    non-module attributes.
+    """
+    return tuple(
+        (name, value)
+        for name, value in sorted(module.__dict__.items())
+        if not (name.startswith("_") or _inspect.ismodule(value))
     )
 
-    for module_name in _modules:
-        if not hasattr(obj, module_name):
-            setattr(obj, module_name, getattr(_module, module_name))
+
+#: Computed once at import time, the module namespaces don't change afterwards.
+_SA_ATTRS = _public_attributes(sqlalchemy)
+_SA_ORM_ATTRS = _public_attributes(sqlalchemy.orm)
+
+#: The attribute sets that can be mixed in, by name.
+_ATTRS = {
+    "sqlalchemy": _SA_ATTRS,
+    "sqlalchemy.orm": _SA_ORM_ATTRS,
+    "all": _SA_ATTRS + _SA_ORM_ATTRS,
+}
+
+#: The includes for each class, by attribute set name, see :func:`_mixin`.
+_CLASS_INCLUDES = WeakKeyDictionary()
+
+
+def _class_includes(owner, attrs_name):
+    """Return the attributes of the ``attrs_name`` set that ``owner`` doesn't
+    already define, computed once per class.
+    """
+    by_name = _CLASS_INCLUDES.get(owner)
+    if by_name is None:
+        by_name = _CLASS_INCLUDES[owner] = {}
+    includes = by_name.get(attrs_name)
+    if includes is None:
+        includes = {}
+        for name, value in _ATTRS[attrs_name]:
+            if name not in includes and not hasattr(owner, name):
+                includes[name] = value
+        by_name[attrs_name] = includes
+    return includes
+
+
+def _mixin(obj, attrs_name):
+    """Copy the ``attrs_name`` attributes onto ``obj`` in one ``__dict__``
+    update, skipping any name ``obj`` already resolves (including class level
+    properties).
+    """
+    d = obj.__dict__
+    d.update(
+        {
+            name: value
+            for name, value in _class_includes(type(obj), attrs_name).items()
+            if name not in d
+        }
+    )
     return obj
 
 
+def mixin_sqlalchemy(obj, cls):
+    return _mixin(obj, "sqlalchemy")
+
+
 def mixin_sqlalchemy_orm(obj, cls):
-    import sqlalchemy.orm
+    return _mixin(obj, "sqlalchemy.orm")
 
-    _module = sqlalchemy.orm
-    _modules = sorted(
-        name
-        for name, obj in _module.__dict__.items()
-        if not (name.startswith("_") or _inspect.ismodule(obj))
-    )
 
-    for module_name in _modules:
-        if not hasattr(obj, module_name):
-            setattr(obj, module_name, getattr(_module, module_name))
-    return obj
+def mixin_sqlalchemy_all(obj, cls):
+    """Equivalent to :func:`mixin_sqlalchemy` followed by
+    :func:`mixin_sqlalchemy_orm`, as a single ``__dict__`` update.
+    """
+    return _mixin(obj, "all")
@@ -1,14 +1,16 @@
+import functools
 import re
 import sqlalchemy as sa
 from sqlalchemy import inspect
 from sqlalchemy.orm.decl_api import DeclarativeMeta, declared_attr
 from sqlalchemy.schema import _get_table_key
 from typing import Any
-from .utils import has_primary_key
+from .utils import has_primary_key, intern_bind_key
 
 camelcase_re = re.compile(r"([A-Z]+)(?=[a-z0-9])")
 
 
+@functools.lru_cache(maxsize=1024)
 def camel_to_snake_case(name):
     def _join(match):
         word = match.group()
@@ -55,6 +57,16 @@ def should_set_tablename(cls):
     return True
 
 
+def _supplies_primary_key(cls):
+    """Returns whether any class in the MRO of ``cls`` defines a primary key
+    column or a mapped ``__table__``.
+    """
+    return any(
+        base.__dict__.get("__table__") is not None or has_primary_key(base)
+        for base in cls.__mro__
+    )
+
+
 class AutoBigIntegerIdentifierMetaMixin(object):
     """
     A meta class for auto-generating `BigInteger` primary key columns on models.
@@ -64,20 +76,21 @@ class AutoBigIntegerIdentifierMetaMixin(object):
         cls, classname: str, bases: tuple[type[Any], ...], dict_: dict[str, Any]
     ) -> None:
         """ """
-        #: Check to see if the class has at least one primary key defined. If
-        #: not, automatically generate one.
-        has_primary = has_primary_key(cls)
-
-        if not has_primary:
-            cls.__dict__.update(
-                {"id": sa.Column("id", sa.BigInteger, nullable=False, primary_key=True)}
-            )
-            cls.__dict__["id"]._creation_order = 1
-
-            dict_.update(
-                {"id": sa.Column("id", sa.BigInteger, nullable=False, primary_key=True)}
-            )
-            dict_["id"]._creation_order = 1
+        #: The declarative base and abstract models are never mapped, a column
+        #: set on them would be copied into every subclass.
+        if dict_.get("__abstract__", False):
+            return super().__init__(classname, bases, dict_)
+
+        #: Check to see if the class, a mixin or a mapped parent already
+        #: defines a primary key. If not, automatically generate one.
+        if not _supplies_primary_key(cls):
+            #: ``cls.__dict__`` is a read-only mapping proxy, so the column is
+            #: set through ``type.__setattr__`` as declarative scans the class
+            #: namespace, not ``dict_``.
+            column = sa.Column("id", sa.BigInteger, nullable=False, primary_key=True)
+            column._creation_order = 1
+            type.__setattr__(cls, "id", column)
+            dict_["id"] = column
         super().__init__(classname, bases, dict_)
 
 
@@ -91,8 +104,12 @@ class BindMetaMixin(object):
 
         super().__init__(classname, bases, dict_)
 
-        if bind_key is not None and getattr(cls, "__table__", None) is not None:
-            cls.__table__.info["bind_key"] = bind_key
+        #: Most models use the default bind, nothing else to do for them.
+        if bind_key is None:
+            return
+
+        if getattr(cls, "__table__", None) is not None:
+            cls.__table__.info["bind_key"] = intern_bind_key(bind_key)
 
 
 class NameMetaMixin(object):
@@ -138,7 +155,6 @@ class NameMetaMixin(object):
         # if a primary key or constraint is found, create a table for
         # joined-table inheritance
         for arg in args:
-            print(arg)
             if (isinstance(arg, sa.Column) and arg.primary_key) or isinstance(
                 arg, sa.PrimaryKeyConstraint
             ):
@@ -179,9 +195,11 @@ class Model(object):
     query = None
 
     def __repr__(self):
+        #: The identity is the primary key tuple SQLAlchemy already keeps for
+        #: persistent instances, so no mapper or column lookups are needed.
         identity = inspect(self).identity
         if identity is None:
             pk = "(transient {})".format(id(self))
         else:
-            pk = ", ".join(str(value) for value in identity)
+            pk = ", ".join(map(str, identity))
         return "<{} {}>".format(type(self).__name__, pk)
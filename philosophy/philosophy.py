@@ -4,45 +4,40 @@
 
     This module is the core implementation of the Philosophy library.
 """
-import functools
 import sqlalchemy
-import sys
 import time
+from collections import defaultdict
 from sqlalchemy import event, orm
 from sqlalchemy.engine import Engine, Connection
 from sqlalchemy.engine.url import make_url
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
-from sqlalchemy.ext.declarative import DeclarativeMeta
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import DeclarativeMeta, declarative_base
 from sqlalchemy.orm.exc import UnmappedClassError
 from sqlalchemy.orm.session import Session as SessionBase
 from threading import Lock
 from typing import Any
 from typing import Optional
 from typing import Union
+from weakref import WeakValueDictionary
 from .model import DefaultMeta, Model
-from .mixin import mixin_sqlalchemy, mixin_sqlalchemy_orm
+from .mixin import mixin_sqlalchemy_all
+from .utils import intern_bind_key
 
 
 # the best timer function for the platform
-if sys.platform == "win32":
-    if sys.version_info >= (3, 3):
-        _timer = time.perf_counter
-    else:
-        _timer = time.clock
-else:
-    _timer = time.time
+_timer = time.perf_counter
 
 
 def _make_table(db):
     #: TODO this seems "utility-ish", move it out of here to either utils or something more appropriate to SQLAlchemy??
-    def _make_table(*args, **kwargs):
+    def _make_table(*args, info=None, **kwargs):
         if len(args) > 1 and isinstance(args[1], db.Column):
             args = (args[0], db.metadata) + args[1:]
-        info = kwargs.pop("info", None) or {}
-        info.setdefault("bind_key", None)
-        kwargs["info"] = info
-        return sqlalchemy.Table(*args, **kwargs)
+        if not info:
+            info = {"bind_key": None}
+        elif "bind_key" not in info:
+            info["bind_key"] = None
+        return sqlalchemy.Table(*args, info=info, **kwargs)
 
     return _make_table
 
@@ -53,7 +48,10 @@ def _set_default_query_class(d, cls):
 
 
 def _wrap_with_default_query_class(fn, cls):
-    @functools.wraps(fn)
+    #: Without a query class there is no default to inject.
+    if cls is None:
+        return fn
+
     def newfn(*args, **kwargs):
         _set_default_query_class(kwargs, cls)
         if "backref" in kwargs:
@@ -63,20 +61,59 @@ def _wrap_with_default_query_class(fn, cls):
             _set_default_query_class(backref[1], cls)
         return fn(*args, **kwargs)
 
+    #: Only copy what introspection needs instead of ``functools.wraps``.
+    newfn.__name__ = getattr(fn, "__name__", "newfn")
+    newfn.__doc__ = getattr(fn, "__doc__", None)
+    newfn.__wrapped__ = fn
     return newfn
 
 
 def _include_sqlalchemy(obj, cls):
-    obj = mixin_sqlalchemy(obj, cls)
-    obj = mixin_sqlalchemy_orm(obj, cls)
+    obj = mixin_sqlalchemy_all(obj, cls)
 
     # Note: obj.Table does not attempt to be a SQLAlchemy Table class.
     obj.Table = _make_table(obj)
-    obj.relationship = _wrap_with_default_query_class(obj.relationship, cls)
-    obj.dynamic_loader = _wrap_with_default_query_class(obj.dynamic_loader, cls)
+    if cls is not None:
+        obj.relationship = _wrap_with_default_query_class(obj.relationship, cls)
+        obj.dynamic_loader = _wrap_with_default_query_class(obj.dynamic_loader, cls)
     obj.event = event
 
 
+def _get_mapper_bind_key(mapper):
+    """Returns the ``bind_key`` stored in the info of the mapper's table."""
+    info = getattr(mapper.persist_selectable, "info", None)
+    return info.get("bind_key") if info else None
+
+
+def _freeze(value):
+    """Recursively convert dicts, lists and sets into hashable tuples so that
+    ``value`` can be used as part of a dictionary key.
+    """
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    return value
+
+
+def _is_sqlite_memory(sa_url):
+    return sa_url.drivername.startswith("sqlite") and sa_url.database in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def _all_binds(config):
+    """Returns the default bind (``None``) followed by the configured binds."""
+    binds = config.get("SQLALCHEMY_BINDS")
+    if not binds:
+        return [None]
+    return [None, *binds]
+
+
 def get_state(philosophy_adapter):
     """Gets the state for the philosophy adapter"""
     assert "sqlalchemy" in philosophy_adapter.extensions, (
@@ -92,32 +129,54 @@ class _EngineConnector(object):
         self._philosophy = philosophy
         self._philosophy_adapter = philosophy_adapter
         self._engine = None
-        self._connected_for = None
+        self._uri_cache = None
+        self._echo_cache = None
         self._bind = bind
         self._lock = Lock()
 
     def get_uri(self):
         if self._bind is None:
             return self._philosophy_adapter.config["SQLALCHEMY_DATABASE_URI"]
-        binds = self._philosophy_adapter.config.get("SQLALCHEMY_BINDS") or ()
-        assert self._bind in binds, (
+        binds = self._philosophy_adapter.config.get("SQLALCHEMY_BINDS") or {}
+        uri = binds.get(self._bind)
+        assert uri is not None, (
             "Bind %r is not specified.  Set it in the SQLALCHEMY_BINDS "
             "configuration variable" % self._bind
         )
-        return binds[self._bind]
+        return uri
+
+    def _get_cached_engine(self, uri, echo):
+        if uri == self._uri_cache and echo == self._echo_cache:
+            return self._engine
+        return None
 
     def get_engine(self):
+        #: The lock is only needed to (re)create the engine, the cached one can
+        #: be read without it.
+        config = self._philosophy_adapter.config
+        uri = self.get_uri()
+        echo = config["SQLALCHEMY_ECHO"]
+        engine = self._get_cached_engine(uri, echo)
+        if engine is not None:
+            return engine
+
         with self._lock:
             uri = self.get_uri()
-            echo = self._philosophy_adapter.config["SQLALCHEMY_ECHO"]
-            if (uri, echo) == self._connected_for:
-                return self._engine
+            echo = config["SQLALCHEMY_ECHO"]
+            engine = self._get_cached_engine(uri, echo)
+            if engine is not None:
+                return engine
 
             sa_url = make_url(uri)
             options = self.get_options(sa_url, echo)
-            self._engine = rv = self._philosophy.create_engine(sa_url, options)
+            rv = self._philosophy.get_shared_engine(sa_url, options)
 
-            self._connected_for = (uri, echo)
+            #: Clear the engine before updating the cache keys so a reader
+            #: that sees the new keys never picks up the previous engine.
+            self._engine = None
+            self._uri_cache = uri
+            self._echo_cache = echo
+            self._engine = rv
 
             return rv
 
@@ -141,22 +200,41 @@ class _EngineConnector(object):
 class _PhilosophyState(object):
     """Remembers configuration for the (db, app) tuple."""
 
+    __slots__ = ("db", "connectors", "binds_cache", "binds_cache_key")
+
     def __init__(self, db):
         self.db = db
         self.connectors = {}
+        self.binds_cache = None
+        self.binds_cache_key = None
+
+
+#: Class attribute used by :class:`_QueryProperty` to cache a model's mapper.
+_QUERY_MAPPER_ATTR = "_philosophy_mapper"
 
 
 class _QueryProperty(object):
     def __init__(self, sa):
         self.sa = sa
 
-    def __get__(self, obj, type):
-        try:
-            mapper = orm.class_mapper(type)
-            if mapper:
-                return type.query_class(mapper, session=self.sa.session())
-        except UnmappedClassError:
-            return None
+    def __get__(self, obj, owner):
+        #: The mapper is cached on the class itself once it is mapped, which
+        #: skips ``class_mapper``'s configuration check on later accesses.  It
+        #: is only trusted while the class is still mapped by it, disposing
+        #: the registry removes the class manager.
+        owner_dict = owner.__dict__
+        mapper = owner_dict.get(_QUERY_MAPPER_ATTR)
+        if mapper is None or mapper.class_manager is not owner_dict.get(
+            "_sa_class_manager"
+        ):
+            try:
+                mapper = orm.class_mapper(owner)
+            except UnmappedClassError:
+                return None
+            type.__setattr__(owner, _QUERY_MAPPER_ATTR, mapper)
+
+        if mapper:
+            return owner.query_class(mapper, session=self.sa.session())
 
 
 class PhilosophyAdapter(object):
@@ -176,8 +254,8 @@ class PhilosophyAdapter(object):
 
     def __init__(self, app=None):
         self.app = app
-        self.config = dict()
-        self.extensions = dict()
+        self.config = {}
+        self.extensions = {}
 
 
 class Philosophy(object):
@@ -185,6 +263,13 @@ class Philosophy(object):
     session.
     """
 
+    #: Engines shared by every ``Philosophy`` instance in the process, keyed by
+    #: the class, URL and engine options they were created with.  Only the
+    #: connectors hold on to them, an engine no connector uses anymore (e.g.
+    #: after its URL changed) is released.
+    _sqla_engines = WeakValueDictionary()
+    _sqla_engines_lock = Lock()
+
     @property
     def engine(self):
         """Return the engine."""
@@ -217,6 +302,8 @@ class Philosophy(object):
         self.Model = self.make_declarative_base(model_class, metadata)
         self._engine_lock = Lock()
         self._engine_options = engine_options or {}
+        self._tables_by_bind_cache = None
+        self._tables_by_bind_tables = None
 
         _include_sqlalchemy(self, query_class)
         self.set_adapter(adapter=adapter)
@@ -226,21 +313,43 @@ class Philosophy(object):
         if adapter is not None:
             self.init_adapter(adapter)
 
-    def _execute_for_all_tables(self, adapter, bind, operation, skip_tables=False):
+    def _execute_for_all_tables(
+        self, adapter, bind, operation, skip_tables=False, tables=None
+    ):
         adapter = self.get_adapter(adapter)
 
         if bind == "__all__":
-            binds = [None] + list(adapter.config.get("SQLALCHEMY_BINDS") or ())
+            binds = _all_binds(adapter.config)
         elif isinstance(bind, str) or bind is None:
             binds = [bind]
         else:
             binds = bind
 
+        if tables is not None:
+            #: Only visit the engines that the given tables are bound to.
+            tables_by_bind = defaultdict(list)
+            for table in tables:
+                tables_by_bind[table.info.get("bind_key")].append(table)
+            binds = list(binds)
+            unrouted = [
+                table.name
+                for key, group in tables_by_bind.items()
+                if key not in binds
+                for table in group
+            ]
+            if unrouted:
+                raise RuntimeError(
+                    "Tables %r are not bound to any of the binds %r."
+                    % (unrouted, binds)
+                )
+            binds = [bind for bind in binds if bind in tables_by_bind]
+
         for bind in binds:
             extra = {}
-            if not skip_tables:
-                tables = self.get_tables_for_bind(bind)
-                extra["tables"] = tables
+            if tables is not None:
+                extra["tables"] = tables_by_bind[bind]
+            elif not skip_tables:
+                extra["tables"] = self.get_tables_for_bind(bind)
             op = getattr(self.Model.metadata, operation)
             op(bind=self.get_engine(adapter, bind), **extra)
 
@@ -278,9 +387,9 @@ class Philosophy(object):
             if sa_url.drivername != "mysql+gaerdbms":
                 options.setdefault("pool_size", 10)
                 options.setdefault("pool_recycle", 7200)
-        elif sa_url.drivername == "sqlite":
+        elif sa_url.drivername.startswith("sqlite"):
             pool_size = options.get("pool_size")
-            if sa_url.database in (None, "", ":memory:"):
+            if _is_sqlite_memory(sa_url):
                 from sqlalchemy.pool import StaticPool
 
                 options["poolclass"] = StaticPool
@@ -297,15 +406,17 @@ class Philosophy(object):
                     )
             # if pool size is None or explicitly set to 0 we assume the
             # user did not want a queue for this sqlite connection and
-            # hook in the null pool.
-            elif not pool_size:
+            # hook in the null pool.  Explicit drivers keep their default pool.
+            elif not pool_size and sa_url.drivername == "sqlite":
                 from sqlalchemy.pool import NullPool
 
                 options["poolclass"] = NullPool
 
-    def create_all(self, bind="__all__", philosophy_adapter=None):
-        """Creates all tables."""
-        self._execute_for_all_tables(philosophy_adapter, bind, "create_all")
+    def create_all(self, bind="__all__", philosophy_adapter=None, tables=None):
+        """Creates all tables, or only ``tables`` if given."""
+        self._execute_for_all_tables(
+            philosophy_adapter, bind, "create_all", tables=tables
+        )
 
     def create_scoped_session(self, options=None):
         if options is None:
@@ -326,22 +437,45 @@ class Philosophy(object):
     def _create_session(self, options):
         return orm.sessionmaker(class_=PhilosophySession, db=self, **options)
 
-    def drop_all(self, bind="__all__", philosophy_adapter=None):
-        """Drops all tables."""
-        self._execute_for_all_tables(philosophy_adapter, bind, "drop_all")
+    def drop_all(self, bind="__all__", philosophy_adapter=None, tables=None):
+        """Drops all tables, or only ``tables`` if given."""
+        self._execute_for_all_tables(
+            philosophy_adapter, bind, "drop_all", tables=tables
+        )
 
     def get_binds(self, adapter=None):
         """Returns a dictionary with a table->engine mapping.
         This is suitable for use of sessionmaker(binds=db.get_binds(app)).
         """
         adapter = self.get_adapter(adapter)
-        binds = [None] + list(adapter.config.get("SQLALCHEMY_BINDS") or ())
+        state = get_state(adapter)
+        tables_by_bind = self._tables_by_bind()
+
+        #: The mapping only changes when the configured engines or the tables
+        #: in the metadata change.  The state is shared by every instance
+        #: initialized on the adapter, so the key names this instance's
+        #: metadata too.
+        config = adapter.config
+        key = (
+            self.Model.metadata,
+            config.get("SQLALCHEMY_DATABASE_URI"),
+            tuple((config.get("SQLALCHEMY_BINDS") or {}).items()),
+            config.get("SQLALCHEMY_ECHO"),
+            self._tables_by_bind_tables,
+        )
+        if state.binds_cache_key == key:
+            return dict(state.binds_cache)
+
+        binds = _all_binds(config)
         retval = {}
         for bind in binds:
             engine = self.get_engine(adapter, bind)
-            tables = self.get_tables_for_bind(bind)
+            tables = tables_by_bind.get(bind, ())
             retval.update(dict((table, engine) for table in tables))
-        return retval
+
+        state.binds_cache = retval
+        state.binds_cache_key = key
+        return dict(retval)
 
     def get_adapter(self, adapter=None):
         if self.adapter is not None:
@@ -358,14 +492,20 @@ class Philosophy(object):
         adapter = self.get_adapter(adapter)
         state = get_state(adapter)
 
-        with self._engine_lock:
-            connector = state.connectors.get(bind)
+        connector = state.connectors.get(bind)
+
+        if connector is None:
+            #: Only creating a connector needs the lock, re-check under it in
+            #: case another thread created it first.
+            with self._engine_lock:
+                connector = state.connectors.get(bind)
 
-            if connector is None:
-                connector = self.make_connector(adapter, bind)
-                state.connectors[bind] = connector
+                if connector is None:
+                    bind = intern_bind_key(bind)
+                    connector = self.make_connector(adapter, bind)
+                    state.connectors[bind] = connector
 
-            return connector.get_engine()
+        return connector.get_engine()
 
     def create_engine(self, sa_url, engine_opts):
         """
@@ -380,6 +520,35 @@ class Philosophy(object):
         else:
             return self._create_engine(sa_url, engine_opts)
 
+    def get_shared_engine(self, sa_url, engine_opts):
+        """Returns the process wide engine for ``sa_url`` and ``engine_opts``,
+        creating it with :meth:`create_engine` on first use.
+
+        In memory SQLite engines are never shared, every one of them is a
+        separate database.
+        """
+        if _is_sqlite_memory(sa_url):
+            return self.create_engine(sa_url, engine_opts)
+
+        try:
+            key = (
+                type(self),
+                self.async_,
+                sa_url.render_as_string(hide_password=False),
+                _freeze(engine_opts),
+            )
+            hash(key)
+        except TypeError:
+            # unhashable engine options, don't share the engine
+            return self.create_engine(sa_url, engine_opts)
+
+        with self._sqla_engines_lock:
+            engine = self._sqla_engines.get(key)
+            if engine is None:
+                engine = self.create_engine(sa_url, engine_opts)
+                self._sqla_engines[key] = engine
+            return engine
+
     def _create_async_engine(self, sa_url, engine_opts):
         """Create an async engine."""
         engine = create_async_engine(sa_url, **engine_opts)
@@ -392,11 +561,24 @@ class Philosophy(object):
 
     def get_tables_for_bind(self, bind=None):
         """Returns a list of all tables relevant for a bind."""
-        result = []
-        for table in iter(self.Model.metadata.tables.values()):
-            if table.info.get("bind_key") == bind:
-                result.append(table)
-        return result
+        return list(self._tables_by_bind().get(bind, ()))
+
+    def _tables_by_bind(self):
+        """Returns a ``{bind_key: [tables]}`` index of the metadata's tables.
+
+        The index is rebuilt whenever a table is attached to or removed from
+        the metadata.
+        """
+        #: Tables compare by identity, so comparing the snapshot of the tables
+        #: catches one table being swapped for another as well.
+        tables = tuple(self.Model.metadata.tables.values())
+        if tables != self._tables_by_bind_tables:
+            index = defaultdict(list)
+            for table in tables:
+                index[table.info.get("bind_key")].append(table)
+            self._tables_by_bind_cache = dict(index)
+            self._tables_by_bind_tables = tables
+        return self._tables_by_bind_cache
 
     def make_connector(self, adapter=None, bind=None):
         """Creates the connector for a given state and bind."""
@@ -454,15 +636,7 @@ class PhilosophyAsyncSession(AsyncSession):
         """
         # mapper is None if someone tries to just get a connection
         if mapper is not None:
-            try:
-                # SA >= 1.3
-                persist_selectable = mapper.persist_selectable
-            except AttributeError:
-                # SA < 1.3
-                persist_selectable = mapper.mapped_table
-
-            info = getattr(persist_selectable, "info", {})
-            bind_key = info.get("bind_key")
+            bind_key = _get_mapper_bind_key(mapper)
             if bind_key is not None:
                 state = get_state(self.adapter)
                 return state.db.get_engine(self.adapter, bind=bind_key)
@@ -491,15 +665,7 @@ class PhilosophySession(SessionBase):
         """
         # mapper is None if someone tries to just get a connection
         if mapper is not None:
-            try:
-                # SA >= 1.3
-                persist_selectable = mapper.persist_selectable
-            except AttributeError:
-                # SA < 1.3
-                persist_selectable = mapper.mapped_table
-
-            info = getattr(persist_selectable, "info", {})
-            bind_key = info.get("bind_key")
+            bind_key = _get_mapper_bind_key(mapper)
             if bind_key is not None:
                 state = get_state(self.adapter)
                 return state.db.get_engine(self.adapter, bind=bind_key)
@@ -1,11 +1,16 @@
 import pytest
+import sqlalchemy as sa
 from .. import philosophy
 from datetime import datetime
 
 
 @pytest.fixture
 def db(database_manager):
-    return philosophy.Philosophy(database_manager)
+    #: Function scoped on purpose, tests declare models with clashing names
+    #: that need a fresh declarative base and metadata each time.
+    db = philosophy.Philosophy(database_manager)
+    yield db
+    db.session.remove()
 
 
 @pytest.fixture
@@ -15,6 +20,21 @@ def database_manager():
     return database_manager
 
 
+@pytest.fixture
+def inspector_for(db, database_manager):
+    """Returns an inspector per bind, shared for the whole test so that its
+    reflection cache is reused between assertions.
+    """
+    inspectors = {}
+
+    def inspector_for(bind=None):
+        if bind not in inspectors:
+            inspectors[bind] = sa.inspect(db.get_engine(database_manager, bind))
+        return inspectors[bind]
+
+    return inspector_for
+
+
 @pytest.fixture
 def Todo(db):
     class Todo(db.Model):
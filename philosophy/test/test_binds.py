@@ -1,3 +1,9 @@
+import gc
+import pytest
+import sqlalchemy as sa
+from .. import philosophy
+
+
 def test_engine_lookup(db, database_manager):
     database_manager.config["SQLALCHEMY_BINDS"] = {
         "foo": "sqlite://",
@@ -12,7 +18,7 @@ def test_engine_lookup(db, database_manager):
         assert str(engine.url) == database_manager.config["SQLALCHEMY_BINDS"][key]
 
 
-def test_basic_binds(db, database_manager):
+def test_basic_binds(db, database_manager, inspector_for):
     database_manager.config["SQLALCHEMY_BINDS"] = {
         "foo": "sqlite://",
         "bar": "sqlite://",
@@ -30,7 +36,7 @@ def test_basic_binds(db, database_manager):
     class Baz(db.Model):
         id = db.Column(db.Integer, primary_key=True)
 
-    db.create_all()
+    db.create_all(tables=[Foo.__table__, Bar.__table__, Baz.__table__])
 
     # do the models have the correct engines?
     assert db.metadata.tables["foo"].info["bind_key"] == "foo"
@@ -38,20 +44,9 @@ def test_basic_binds(db, database_manager):
     assert db.metadata.tables["baz"].info.get("bind_key") is None
 
     # see the tables created in an engine
-    metadata = db.MetaData()
-    metadata.reflect(bind=db.get_engine(database_manager, "foo"))
-    assert len(metadata.tables) == 1
-    assert "foo" in metadata.tables
-
-    metadata = db.MetaData()
-    metadata.reflect(bind=db.get_engine(database_manager, "bar"))
-    assert len(metadata.tables) == 1
-    assert "bar" in metadata.tables
-
-    metadata = db.MetaData()
-    metadata.reflect(bind=db.get_engine(database_manager))
-    assert len(metadata.tables) == 1
-    assert "baz" in metadata.tables
+    assert inspector_for("foo").get_table_names() == ["foo"]
+    assert inspector_for("bar").get_table_names() == ["bar"]
+    assert inspector_for().get_table_names() == ["baz"]
 
     # do the session have the right binds set?
     assert db.get_binds(database_manager) == {
@@ -61,7 +56,7 @@ def test_basic_binds(db, database_manager):
     }
 
 
-def test_abstract_binds(db, database_manager):
+def test_abstract_binds(db, database_manager, inspector_for):
     database_manager.config["SQLALCHEMY_BINDS"] = {"foo": "sqlite://"}
 
     class AbstractFooBoundModel(db.Model):
@@ -77,10 +72,7 @@ def test_abstract_binds(db, database_manager):
     assert db.metadata.tables["foo_bound_model"].info["bind_key"] == "foo"
 
     # see the tables created in an engine
-    metadata = db.MetaData()
-    metadata.reflect(bind=db.get_engine(database_manager, "foo"))
-    assert len(metadata.tables) == 1
-    assert "foo_bound_model" in metadata.tables
+    assert inspector_for("foo").get_table_names() == ["foo_bound_model"]
 
 
 def test_polymorphic_bind(db, database_manager):
@@ -109,3 +101,145 @@ def test_polymorphic_bind(db, database_manager):
 
     assert Base.__table__.info["bind_key"] == bind_key
     assert Child1.__table__.info["bind_key"] == bind_key
+
+
+def test_get_binds_tracks_config_and_tables(db, database_manager):
+    database_manager.config["SQLALCHEMY_BINDS"] = {"foo": "sqlite://"}
+
+    class Foo(db.Model):
+        __bind_key__ = "foo"
+        id = db.Column(db.Integer, primary_key=True)
+
+    assert db.get_binds(database_manager) == {
+        Foo.__table__: db.get_engine(database_manager, "foo"),
+    }
+
+    class Bar(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+
+    assert db.get_binds(database_manager) == {
+        Foo.__table__: db.get_engine(database_manager, "foo"),
+        Bar.__table__: db.get_engine(database_manager, None),
+    }
+
+    database_manager.config["SQLALCHEMY_BINDS"] = {"foo": "sqlite:///:memory:"}
+    engine = db.get_engine(database_manager, "foo")
+    assert db.get_binds(database_manager)[Foo.__table__] is engine
+
+
+def test_engines_shared_between_instances(tmp_path):
+    file_uri = f"sqlite:///{tmp_path / 'shared.db'}"
+    engines = []
+    for uri in 2 * [file_uri] + 2 * ["sqlite://"]:
+        database_manager = philosophy.PhilosophyAdapter()
+        database_manager.config["SQLALCHEMY_DATABASE_URI"] = uri
+        engines.append(philosophy.Philosophy(database_manager).engine)
+
+    def cached_engines():
+        return [
+            engine
+            for key, engine in list(philosophy.Philosophy._sqla_engines.items())
+            if key[2] == file_uri
+        ]
+
+    # file databases share an engine, in memory databases are all distinct
+    assert engines[0] is engines[1]
+    assert engines[2] is not engines[3]
+    assert cached_engines() == [engines[0]]
+
+    # once nothing uses the shared engine anymore it is released
+    del database_manager, engines
+    gc.collect()
+    assert cached_engines() == []
+
+
+def test_sqlite_memory_static_pool(db, database_manager):
+    database_manager.config["SQLALCHEMY_BINDS"] = {"foo": "sqlite+pysqlite://"}
+
+    for key in None, "foo":
+        assert isinstance(db.get_engine(database_manager, key).pool, sa.pool.StaticPool)
+
+
+def test_get_binds_tracks_replaced_tables(db, database_manager):
+    class Foo(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+
+    assert list(db.get_binds(database_manager)) == [Foo.__table__]
+
+    # same number of tables, but a different one
+    db.metadata.remove(Foo.__table__)
+    bar = db.Table("bar", db.Column("id", db.Integer, primary_key=True))
+
+    assert list(db.get_binds(database_manager)) == [bar]
+
+
+def test_create_all_tables(db, database_manager, inspector_for):
+    database_manager.config["SQLALCHEMY_BINDS"] = {"foo": "sqlite://"}
+
+    class Foo(db.Model):
+        __bind_key__ = "foo"
+        id = db.Column(db.Integer, primary_key=True)
+
+    class Bar(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+
+    db.create_all(tables=[Foo.__table__])
+
+    assert inspector_for("foo").get_table_names() == ["foo"]
+    assert inspector_for().get_table_names() == []
+
+    # tables that none of the binds can reach are an error
+    with pytest.raises(RuntimeError):
+        db.create_all(bind="foo", tables=[Bar.__table__])
+
+    db.drop_all(tables=[Foo.__table__])
+
+    # a fresh inspector, the shared one caches the table names
+    assert sa.inspect(db.get_engine(database_manager, "foo")).get_table_names() == []
+    with pytest.raises(RuntimeError):
+        db.drop_all(bind="foo", tables=[Bar.__table__])
+
+
+def test_get_binds_per_instance(database_manager):
+    db1 = philosophy.Philosophy(database_manager)
+    db2 = philosophy.Philosophy(database_manager)
+
+    class One(db1.Model):
+        id = db1.Column(db1.Integer, primary_key=True)
+
+    class Two(db2.Model):
+        id = db2.Column(db2.Integer, primary_key=True)
+
+    assert list(db1.get_binds(database_manager)) == [One.__table__]
+    assert list(db2.get_binds(database_manager)) == [Two.__table__]
+    assert list(db1.get_binds(database_manager)) == [One.__table__]
+
+
+def test_sqlite_file_pool(db, database_manager):
+    for drivername, poolclass in (
+        ("sqlite", sa.pool.NullPool),
+        ("sqlite+pysqlite", None),
+    ):
+        options = {}
+        sa_url = sa.engine.make_url(f"{drivername}:///file.db")
+        db.apply_driver_hacks(database_manager, sa_url, options)
+        assert options.get("poolclass") is poolclass
+
+
+def test_session_uses_bind_key(db, database_manager, inspector_for):
+    database_manager.config["SQLALCHEMY_BINDS"] = {"foo": "sqlite://"}
+
+    class Foo(db.Model):
+        __bind_key__ = "foo"
+        id = db.Column(db.Integer, primary_key=True)
+
+    db.create_all()
+    db.session.add(Foo(id=1))
+    db.session.commit()
+
+    engine = db.get_engine(database_manager, "foo")
+    assert db.session().get_bind(Foo.__mapper__) is engine
+    assert db.session.get(Foo, 1).id == 1
+    with engine.connect() as connection:
+        assert connection.execute(sa.select(Foo.id)).scalars().all() == [1]
+    assert inspector_for().get_table_names() == []
@@ -1,10 +1,9 @@
 # coding=utf8
 import pytest
 from .. import philosophy
-from ..model import BindMetaMixin
+from ..model import AutoBigIntegerIdentifierMetaMixin, BindMetaMixin, DefaultMeta
 from sqlalchemy.exc import InvalidRequestError
-from sqlalchemy.ext.declarative import DeclarativeMeta
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import DeclarativeMeta, declarative_base
 
 
 def test_custom_model_class():
@@ -35,6 +34,53 @@ def test_no_table_name():
             pass
 
 
+def test_auto_big_integer_identifier():
+    class AutoIdMeta(AutoBigIntegerIdentifierMetaMixin, DefaultMeta):
+        pass
+
+    db = philosophy.Philosophy(
+        model_class=declarative_base(
+            cls=philosophy.Model, metaclass=AutoIdMeta, name="Model"
+        )
+    )
+
+    class User(db.Model):
+        name = db.Column(db.String)
+
+    assert list(User.__table__.primary_key.columns) == [User.__table__.c.id]
+    assert isinstance(User.__table__.c.id.type, db.BigInteger)
+
+    class Group(db.Model):
+        name = db.Column(db.String, primary_key=True)
+
+    assert list(Group.__table__.primary_key.columns) == [Group.__table__.c.name]
+    assert "id" not in Group.__table__.c
+    assert "id" not in db.Model.__dict__
+
+    class Employee(db.Model):
+        name = db.Column(db.String)
+        kind = db.Column(db.String)
+        __mapper_args__ = {"polymorphic_on": kind, "polymorphic_identity": "e"}
+
+    class Manager(Employee):
+        rank = db.Column(db.String)
+        __mapper_args__ = {"polymorphic_identity": "m"}
+
+    # single table inheritance, the parent's id is used
+    assert Manager.__table__ is Employee.__table__
+    assert list(Employee.__table__.primary_key.columns) == [Employee.__table__.c.id]
+
+    class IdMixin(object):
+        id = db.Column(db.Integer, primary_key=True)
+
+    class Tag(IdMixin, db.Model):
+        name = db.Column(db.String)
+
+    assert list(Tag.__table__.primary_key.columns) == [Tag.__table__.c.id]
+    assert isinstance(Tag.__table__.c.id.type, db.Integer)
+    assert not isinstance(Tag.__table__.c.id.type, db.BigInteger)
+
+
 def test_repr(db):
     class User(db.Model):
         name = db.Column(db.String, primary_key=True)
@@ -45,16 +91,16 @@ def test_repr(db):
 
     db.create_all()
 
-    u = User(name="test")
-    assert repr(u).startswith("<User (transient ")
-    db.session.add(u)
+    assert repr(User(name="transient")).startswith("<User (transient ")
+
+    db.session.execute(db.insert(User), [{"name": "test"}, {"name": "🐍"}])
     db.session.flush()
+
+    u = db.session.get(User, "test")
     assert repr(u) == "<User test>"
     assert repr(u) == str(u)
 
-    u2 = User(name="🐍")
-    db.session.add(u2)
-    db.session.flush()
+    u2 = db.session.get(User, "🐍")
     assert repr(u2) == str("<User 🐍>")
     assert repr(u2) == str(u2)
 
@@ -1,32 +1,22 @@
+import pytest
 import sqlalchemy as sa
 from .. import philosophy
 
 
-def test_default_metadata(database_manager):
-    db = philosophy.Philosophy(database_manager, metadata=None)
+class CustomMetaData(sa.MetaData):
+    pass
 
-    class One(db.Model):
-        id = db.Column(db.Integer, primary_key=True)
-        myindex = db.Column(db.Integer, index=True)
 
-    class Two(db.Model):
-        id = db.Column(db.Integer, primary_key=True)
-        one_id = db.Column(db.Integer, db.ForeignKey(One.id))
-        myunique = db.Column(db.Integer, unique=True)
-
-    assert One.metadata.__class__ is sa.MetaData
-    assert Two.metadata.__class__ is sa.MetaData
-
-    assert One.__table__.schema is None
-    assert Two.__table__.schema is None
-
-
-def test_custom_metadata(database_manager):
-    class CustomMetaData(sa.MetaData):
-        pass
-
-    custom_metadata = CustomMetaData(schema="test_schema")
-    db = philosophy.Philosophy(database_manager, metadata=custom_metadata)
+@pytest.mark.parametrize(
+    "metadata,expected_schema,expected_cls",
+    [
+        (None, None, sa.MetaData),
+        (CustomMetaData(schema="test_schema"), "test_schema", CustomMetaData),
+    ],
+    ids=["default", "custom"],
+)
+def test_metadata(database_manager, metadata, expected_schema, expected_cls):
+    db = philosophy.Philosophy(database_manager, metadata=metadata)
 
     class One(db.Model):
         id = db.Column(db.Integer, primary_key=True)
@@ -37,14 +27,12 @@ def test_custom_metadata(database_manager):
         one_id = db.Column(db.Integer, db.ForeignKey(One.id))
         myunique = db.Column(db.Integer, unique=True)
 
-    assert One.metadata is custom_metadata
-    assert Two.metadata is custom_metadata
-
-    assert One.metadata.__class__ is not sa.MetaData
-    assert One.metadata.__class__ is CustomMetaData
+    if metadata is not None:
+        assert One.metadata is metadata
+        assert Two.metadata is metadata
 
-    assert Two.metadata.__class__ is not sa.MetaData
-    assert Two.metadata.__class__ is CustomMetaData
+    assert One.metadata.__class__ is expected_cls
+    assert Two.metadata.__class__ is expected_cls
 
-    assert One.__table__.schema == "test_schema"
-    assert Two.__table__.schema == "test_schema"
+    assert One.__table__.schema == expected_schema
+    assert Two.__table__.schema == expected_schema
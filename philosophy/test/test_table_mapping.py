@@ -1,7 +1,7 @@
 import inspect
 import pytest
 from sqlalchemy.exc import ArgumentError
-from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.orm import declared_attr
 
 
 def test_name(db):
@@ -223,3 +223,14 @@ def test_single_has_parent_table(db):
 
     assert Call.__table__ is Duck.__table__
     assert "__table__" not in Call.__dict__
+
+
+def test_query_after_dispose(db):
+    class Foo(db.Model):
+        id = db.Column(db.Integer, primary_key=True)
+
+    assert Foo.query is not None
+
+    db.Model.registry.dispose()
+
+    assert Foo.query is None
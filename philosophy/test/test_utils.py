@@ -3,9 +3,11 @@ from .. import utils
 
 
 @pytest.fixture
-def mock_sqlalchemy(mocker):
-    _mock = mocker.patch.object(utils, "sqlalchemy")
-    return _mock
+def set_sqlalchemy_version(monkeypatch):
+    def set_sqlalchemy_version(version):
+        monkeypatch.setattr(utils, "_current_sqlalchemy_version", lambda: version)
+
+    return set_sqlalchemy_version
 
 
 def test_parse_version():
@@ -14,8 +16,8 @@ def test_parse_version():
     assert utils.parse_version("1") == (1, 0, 0)
 
 
-def test_sqlalchemy_version(mock_sqlalchemy):
-    mock_sqlalchemy.__version__ = "1.3"
+def test_sqlalchemy_version(set_sqlalchemy_version):
+    set_sqlalchemy_version("1.3")
 
     assert not utils.sqlalchemy_version("<", "1.3")
     assert not utils.sqlalchemy_version(">", "1.3")
@@ -23,7 +25,7 @@ def test_sqlalchemy_version(mock_sqlalchemy):
     assert utils.sqlalchemy_version("==", "1.3")
     assert utils.sqlalchemy_version(">=", "1.3")
 
-    mock_sqlalchemy.__version__ = "1.2.99"
+    set_sqlalchemy_version("1.2.99")
 
     assert utils.sqlalchemy_version("<", "1.3")
     assert not utils.sqlalchemy_version(">", "1.3")
@@ -1,6 +1,20 @@
+import functools
+import operator
+import re
+import sys
 import warnings
 import sqlalchemy
 
+_version_re = re.compile(r"(\d+)(?:\.(\d+))?(?:\.(\d+))?")
+
+_version_ops = {
+    "<": operator.lt,
+    ">": operator.gt,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+}
+
 
 def has_primary_key(cls):
     return any(
@@ -13,6 +27,14 @@ def has_primary_key(cls):
     )
 
 
+def intern_bind_key(bind_key):
+    """Intern string bind keys so that comparing them is an identity check."""
+    if isinstance(bind_key, str):
+        return sys.intern(bind_key)
+    return bind_key
+
+
+@functools.lru_cache(maxsize=128)
 def parse_version(v):
     """
     Take a string version and conver it to a tuple (for easier comparison), e.g.:
@@ -21,28 +43,27 @@ def parse_version(v):
         "1.2" --> (1, 2, 0)
         "1" --> (1, 0, 0)
     """
-    parts = v.split(".")
-    # Pad the list to make sure there is three elements so that we get major, minor, point
-    # comparisons that default to "0" if not given.  I.e. "1.2" --> (1, 2, 0)
-    parts = (parts + 3 * ["0"])[:3]
-    return tuple(int(x) for x in parts)
+    match = _version_re.match(v)
+    if match is None:
+        raise ValueError("invalid version: {!r}".format(v))
+    # Missing minor and point parts default to "0", i.e. "1.2" --> (1, 2, 0)
+    major, minor, point = match.groups()
+    return (int(major), int(minor or 0), int(point or 0))
+
+
+def _current_sqlalchemy_version():
+    return sqlalchemy.__version__
 
 
 def sqlalchemy_version(op, val):
-    sa_ver = parse_version(sqlalchemy.__version__)
-    target_ver = parse_version(val)
-
-    assert op in ("<", ">", "<=", ">=", "=="), "op {} not supported".format(op)
-
-    if op == "<":
-        return sa_ver < target_ver
-    if op == ">":
-        return sa_ver > target_ver
-    if op == "<=":
-        return sa_ver <= target_ver
-    if op == ">=":
-        return sa_ver >= target_ver
-    return sa_ver == target_ver
+    # keyed on the installed version so the cached result follows it
+    return _compare_version(_current_sqlalchemy_version(), op, val)
+
+
+@functools.lru_cache(maxsize=None)
+def _compare_version(version, op, val):
+    assert op in _version_ops, "op {} not supported".format(op)
+    return _version_ops[op](parse_version(version), parse_version(val))
 
 
 def engine_config_warning(config, version, deprecated_config_key, engine_option):